@@ -1,21 +1,29 @@
 import io
+import sqlite3
 
 import matplotlib
 import textwrap
 from flask import (Flask, jsonify, redirect, render_template, request,
                    send_file, url_for)
-from log_processor import run_log_processing
+from log_processor import (UploadTooLargeError, ingest_log_stream,
+                           iter_stream_chunks, run_log_processing,
+                           strip_log_suffix)
 
 matplotlib.use("Agg")
-from typing import Dict, Optional
+from typing import IO, Dict, Iterator, Optional, Tuple
 
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
 from orchestrator import Orchestrator
 from tabulate import tabulate
 from collections import defaultdict
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import NEED_DATA, Epilogue, File, MultipartDecoder
+from werkzeug.utils import secure_filename
 
 app = Flask(__name__)
+app.config["MAX_UPLOAD_BYTES"] = 512 * 1024 * 1024  # Per uploaded log file
+app.config["MAX_DECOMPRESSED_BYTES"] = 4 * 1024 * 1024 * 1024  # Per compressed log file
 
 # Global variables for user parameters and orchestrator instance
 user_params: Dict[str, Optional[str]] = {
@@ -23,6 +31,7 @@ user_params: Dict[str, Optional[str]] = {
     "specific_value": None,
     "distance_column": None,
     "status_column": None,
+    "sketch_mode": None,
 }
 
 distance_targets: Dict[int, int] = {
@@ -32,6 +41,7 @@ distance_targets: Dict[int, int] = {
     250: 250,
 }  # Add more if needed
 orchestrator: Optional[Orchestrator] = None
+batch_orchestrator: Optional[Orchestrator] = None
 
 
 @app.route("/")
@@ -72,6 +82,147 @@ def process_logs() -> str:
     return render_template("process_logs.html")
 
 
+def _iter_multipart_uploads(
+    stream: IO[bytes], boundary: bytes, max_bytes: int
+) -> Iterator[Tuple[str, Iterator[bytes]]]:
+    """
+    Split a multipart request body into uploaded files without buffering them.
+
+    Each file is yielded as (filename, chunks) and must be consumed before the next one
+    is read; unconsumed chunks are skipped. Non-file fields are ignored.
+
+    :param stream: Raw request body.
+    :param boundary: Multipart boundary from the Content-Type header.
+    :param max_bytes: Size limit for each uploaded file.
+    :returns: An iterator over (filename, chunks) pairs.
+    :raises UploadTooLargeError: If a file exceeds max_bytes.
+    :raises ValueError: If the body ends before the closing boundary.
+    """
+    decoder = MultipartDecoder(boundary)
+    source = iter_stream_chunks(stream)
+
+    def next_event():
+        event = decoder.next_event()
+        while event is NEED_DATA:
+            decoder.receive_data(next(source, None))
+            event = decoder.next_event()
+        return event
+
+    def file_chunks() -> Iterator[bytes]:
+        received = 0
+        while True:
+            event = next_event()
+            received += len(event.data)
+            if received > max_bytes:
+                raise UploadTooLargeError(
+                    f"Upload exceeds the limit of {max_bytes} bytes."
+                )
+            if event.data:
+                yield event.data
+            if not event.more_data:
+                return
+
+    event = next_event()
+    while not isinstance(event, Epilogue):
+        if isinstance(event, File):
+            chunks = file_chunks()
+            yield event.filename, chunks
+            for _ in chunks:
+                pass
+        event = next_event()
+
+
+def _upload_response(result: Dict[str, object], status: int = 200):
+    """
+    Return an upload result as JSON, or render it on the log processing page for browsers.
+
+    :param result: Result with the processed files and, on failure, an error message.
+    :param status: HTTP status code.
+    :returns: The response and its status code.
+    """
+    if request.accept_mimetypes.best_match(["application/json", "text/html"]) != "text/html":
+        return jsonify(result), status
+
+    summary = [
+        f"{p['file']}: {p['rows']} rows" if "rows" in p else f"{p['file']}: {p['error']}"
+        for p in result.get("processed", [])
+    ]
+    processed = "; ".join(summary) or "none"
+    if "error" in result:
+        message = f"Upload failed: {result['error']} Files processed before the failure: {processed}."
+    else:
+        message = f"Uploaded logs processed: {processed}."
+    return render_template("process_logs.html", message=message), status
+
+
+@app.route("/upload_logs", methods=["POST"])
+def upload_logs():
+    """
+    Stream uploaded log files straight into the CSV output and SQLite database.
+
+    Accepts either a multipart/form-data body with one or more files, or a raw (optionally
+    chunked) body holding a single log named by the ``filename`` query parameter. Logs may
+    be gzip, xz or zstd compressed (.log.gz, .log.xz, .log.zst); corrupt or truncated ones
+    are rejected without committing any rows. The body is read only as fast as it is parsed
+    and loaded, and each file is limited to ``MAX_UPLOAD_BYTES`` (``MAX_DECOMPRESSED_BYTES``
+    once decompressed). ``output_dir`` and ``db_file`` may be given as query parameters.
+    Browser form posts get the log processing page with a summary instead of JSON.
+
+    :returns: JSON object listing the processed files and their row counts.
+    :rtype: Response
+    """
+    output_dir = request.args.get("output_dir", "./output")
+    db_file = request.args.get("db_file", "./logs_data.db")
+    max_bytes = app.config["MAX_UPLOAD_BYTES"]
+
+    mimetype, options = parse_options_header(request.headers.get("Content-Type", ""))
+    if mimetype == "multipart/form-data":
+        if "boundary" not in options:
+            return _upload_response({"error": "Missing multipart boundary."}, 400)
+        uploads = _iter_multipart_uploads(
+            request.stream, options["boundary"].encode("latin-1"), max_bytes
+        )
+    else:
+        filename = request.args.get("filename")
+        if not filename:
+            return _upload_response({"error": "No filename provided"}, 400)
+        uploads = iter(
+            [(filename, iter_stream_chunks(request.stream, max_bytes=max_bytes))]
+        )
+
+    processed = []
+    try:
+        for filename, chunks in uploads:
+            log_name = secure_filename(filename or "")
+            if strip_log_suffix(log_name) is None:
+                processed.append({"file": log_name, "error": "Not a .log file."})
+                continue
+            try:
+                rows = ingest_log_stream(
+                    chunks,
+                    log_name,
+                    output_dir,
+                    db_file,
+                    app.config["MAX_DECOMPRESSED_BYTES"],
+                )
+            except ImportError as e:
+                processed.append({"file": log_name, "error": str(e)})
+                continue
+            processed.append({"file": log_name, "rows": rows})
+    except UploadTooLargeError as e:
+        return _upload_response({"error": str(e), "processed": processed}, 413)
+    except ValueError as e:
+        return _upload_response({"error": str(e), "processed": processed}, 400)
+    except sqlite3.OperationalError as e:
+        # Another writer holds the database lock; the upload can simply be retried
+        return _upload_response(
+            {"error": f"Database is busy, try again later: {e}", "processed": processed},
+            503,
+        )
+
+    return _upload_response({"processed": processed})
+
+
 @app.route("/config", methods=["GET", "POST"])
 def config() -> str:
     """
@@ -85,6 +236,7 @@ def config() -> str:
         user_params["specific_value"] = request.form.get("specific_value")
         user_params["distance_column"] = request.form.get("distance_column")
         user_params["status_column"] = request.form.get("status_column")
+        user_params["sketch_mode"] = request.form.get("sketch_mode")
 
         if (
             not user_params["test_directory"]
@@ -102,6 +254,7 @@ def config() -> str:
             user_params["specific_value"],
             user_params["distance_column"],
             user_params["status_column"],
+            sketch_mode=bool(user_params["sketch_mode"]),
         )
         orchestrator.run_analysis(distance_targets)
         return redirect(url_for("index"))
@@ -109,6 +262,108 @@ def config() -> str:
     return render_template("config.html", user_params=user_params)
 
 
+@app.route("/batch_analysis", methods=["POST"])
+def batch_analysis():
+    """
+    Compute metrics for every (board type, status, distance, angle) combination in one scan.
+
+    Fields missing from the form fall back to the values saved on the configuration page.
+
+    :returns: JSON object describing the dimensions of the computed metrics cube.
+    :rtype: Response
+    """
+    test_directory = request.form.get("test_directory") or user_params["test_directory"]
+    distance_column = (
+        request.form.get("distance_column") or user_params["distance_column"]
+    )
+    status_column = request.form.get("status_column") or user_params["status_column"]
+    if not test_directory or not distance_column or not status_column:
+        return (
+            jsonify(
+                {
+                    "error": "test_directory, distance_column and status_column are required."
+                }
+            ),
+            400,
+        )
+
+    new_orchestrator = Orchestrator(
+        test_directory,
+        user_params["specific_value"] or "",
+        distance_column,
+        status_column,
+    )
+    try:
+        cube = new_orchestrator.run_batch_analysis(distance_targets)
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 400
+    if cube.empty:
+        return (
+            jsonify({"error": "No data available. Please check your configuration."}),
+            404,
+        )
+
+    # Only replace the previous cube once the new one has been built
+    global batch_orchestrator
+    batch_orchestrator = new_orchestrator
+
+    index = cube.index
+    return jsonify(
+        {
+            "cells": len(cube),
+            "board_types": sorted(index.unique("board_type")),
+            "statuses": sorted(index.unique("status")),
+            "distances": sorted(int(d) for d in index.unique("distance")),
+            "angles": sorted(int(a) for a in index.unique("angle")),
+        }
+    )
+
+
+def _slice_from_args(suffix: str) -> Dict[str, object]:
+    """
+    Read slice criteria such as board_type1 or distance2 from the query string.
+
+    :param suffix: Suffix identifying the slice ("1" or "2").
+    :returns: Keyword arguments for Orchestrator.slice_metrics.
+    :raises ValueError: If distance or angle is not an integer.
+    """
+    distance = request.args.get(f"distance{suffix}")
+    angle = request.args.get(f"angle{suffix}")
+    return {
+        "board_type": request.args.get(f"board_type{suffix}"),
+        "status": request.args.get(f"status{suffix}"),
+        "distance": int(distance) if distance else None,
+        "angle": int(angle) if angle else None,
+    }
+
+
+@app.route("/compare_slices")
+def compare_slices():
+    """
+    Compare two slices of the batch metrics cube.
+
+    Each slice is given by optional board_typeN, statusN, distanceN and angleN query
+    parameters (N is 1 or 2). Omitted parameters match every value.
+
+    :returns: JSON object containing the comparison table.
+    :rtype: Response
+    """
+    if batch_orchestrator is None:
+        return jsonify({"error": "Batch analysis has not been run."}), 400
+
+    try:
+        slice1 = _slice_from_args("1")
+        slice2 = _slice_from_args("2")
+    except ValueError:
+        return jsonify({"error": "Invalid distance or angle format."}), 400
+
+    try:
+        table = batch_orchestrator.compare_slices(slice1, slice2)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    return jsonify({"slice1": slice1, "slice2": slice2, "table": table})
+
+
 @app.route("/get_points_data")
 def get_points_data() -> jsonify:
     """
@@ -1,12 +1,35 @@
+import codecs
 import csv
+import gzip
+import io
+import itertools
 import json
+import lzma
 import os
 import re
 import sqlite3
-from typing import Dict, List, Optional, Union
+import uuid
+import zlib
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
 
 import pandas as pd
 
+try:
+    import zstandard
+except ImportError:  # zstd support is optional
+    zstandard = None
+
+LOG_SUFFIXES = (".log", ".log.gz", ".log.zst", ".log.xz")
+DECOMPRESS_STEP = 64 * 1024  # Maximum output of one gzip/xz decompression call
+ZSTD_INPUT_STEP = 64  # zstd decompressobj has no max_length, so output is bounded by input
+CODEC_ERRORS = (zlib.error, lzma.LZMAError) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when a streamed upload exceeds its size limit."""
+
 
 def parse_session_info_entry(entry_content: str) -> Dict[str, str]:
     """Parses a SESSION_INFO_NTF style entry that may contain nested structures.
@@ -47,38 +70,32 @@ def parse_json_blocks(line: str) -> Optional[Union[Dict, List]]:
         return None
 
 
-def process_log_file(log_file: str, csv_file: str) -> None:
-    """Process a log file to extract SESSION_INFO_NTF and JSON data into a CSV file.
+def iter_log_entries(lines: Iterable[str]) -> Iterator[Dict]:
+    """Parse SESSION_INFO_NTF and JSON entries from an iterable of log lines.
 
-    :param str log_file: Path to the input log file.
-    :param str csv_file: Path to the output CSV file.
-    :returns: None
-    :rtype: None
-    """
-    entries: List[Dict] = []
-    with open(log_file, "r") as f:
-        lines = f.readlines()
+    Lines are consumed lazily, so any line source (an open file, a decoded upload stream)
+    can be parsed without holding the whole log in memory.
 
-    idx = 0
-    while idx < len(lines):
-        line = lines[idx].strip()
+    :param Iterable[str] lines: Lines of a log file.
+    :returns: An iterator over the extracted entries.
+    :rtype: Iterator[Dict]
+    """
+    lines = iter(lines)
+    for raw_line in lines:
+        line = raw_line.strip()
 
         if line.startswith("SESSION_INFO_NTF:"):
             entry_lines: List[str] = []
             entry_line = line[len("SESSION_INFO_NTF: ") :]
             entry_lines.append(entry_line)
             if "}" not in line:
-                idx += 1
-                while idx < len(lines):
-                    entry_line = lines[idx].strip()
+                for raw_entry_line in lines:
+                    entry_line = raw_entry_line.strip()
                     entry_lines.append(entry_line)
                     if "}" in entry_line:
                         break
-                    idx += 1
             entry_content = " ".join(entry_lines)
-            kv_dict = parse_session_info_entry(entry_content)
-            entries.append(kv_dict)
-            idx += 1
+            yield parse_session_info_entry(entry_content)
             continue
 
         if "{" in line and "}" in line:
@@ -86,15 +103,161 @@ def process_log_file(log_file: str, csv_file: str) -> None:
             if parsed_json:
                 if "results" in parsed_json:
                     for result in parsed_json["results"]:
-                        flattened_entry = {
+                        yield {
                             "Block": parsed_json.get("Block", None),
                             **result,
                         }
-                        entries.append(flattened_entry)
                 else:
-                    entries.append(parsed_json)
+                    yield parsed_json
+
+
+def strip_log_suffix(log_name: str) -> Optional[str]:
+    """Strip the log and compression extensions from a log file name.
+
+    :param str log_name: File name such as ``Putty_Big_100cm_initf_115200_0_degree_1.log.gz``.
+    :returns: The name without extensions, or None if it is not a (compressed) log file.
+    :rtype: Optional[str]
+    """
+    for suffix in LOG_SUFFIXES:
+        if log_name.endswith(suffix):
+            return log_name[: -len(suffix)]
+    return None
+
+
+def _require_zstandard() -> None:
+    """Raise ImportError if the optional zstandard package is not installed."""
+    if zstandard is None:
+        raise ImportError("The zstandard package is required to read .zst logs.")
+
+
+def open_log_file(log_file: str) -> IO[str]:
+    """Open a plain or compressed log file for reading as text.
+
+    Compressed files are decompressed on the fly as they are read.
+
+    :param str log_file: Path to a .log, .log.gz, .log.xz or .log.zst file.
+    :returns: A text stream over the log content.
+    :rtype: IO[str]
+    :raises ImportError: If the file is zstd-compressed and zstandard is not installed.
+    """
+    if log_file.endswith(".gz"):
+        return gzip.open(log_file, "rt")
+    if log_file.endswith(".xz"):
+        return lzma.open(log_file, "rt")
+    if log_file.endswith(".zst"):
+        _require_zstandard()
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            open(log_file, "rb"), read_across_frames=True, closefd=True
+        )
+        return io.TextIOWrapper(reader)
+    return open(log_file, "r")
+
+
+def _split_chunks(chunks: Iterable[bytes], size: int) -> Iterator[bytes]:
+    """Split byte chunks into pieces of at most size bytes."""
+    for chunk in chunks:
+        for start in range(0, len(chunk), size):
+            yield chunk[start : start + size]
 
-        idx += 1
+
+def _iter_decompressed(
+    chunks: Iterable[bytes],
+    make_decompressor: Callable[[], Any],
+    max_bytes: Optional[int] = None,
+    max_length: Optional[int] = DECOMPRESS_STEP,
+    padding: bytes = b"",
+) -> Iterator[bytes]:
+    """Decompress byte chunks in bounded steps, restarting the decompressor for concatenated streams.
+
+    :param Iterable[bytes] chunks: Compressed bytes in stream order.
+    :param Callable[[], Any] make_decompressor: Factory for a fresh decompressor object.
+    :param Optional[int] max_bytes: Maximum total decompressed size, or None for no limit.
+    :param Optional[int] max_length: Maximum output per decompress call, or None if the
+        decompressor does not support it.
+    :param bytes padding: Byte values skipped between and after streams.
+    :returns: An iterator over the decompressed bytes.
+    :rtype: Iterator[bytes]
+    :raises UploadTooLargeError: If more than max_bytes bytes are decompressed.
+    :raises ValueError: If the data is corrupt or ends in the middle of a stream.
+    """
+    decompressor = make_decompressor()
+    total = 0
+    for chunk in chunks:
+        while True:
+            if decompressor.eof:
+                # A finished stream may be followed by padding or by another stream
+                chunk = chunk.lstrip(padding) if padding else chunk
+                if not chunk:
+                    break
+                decompressor = make_decompressor()
+            try:
+                if max_length is None:
+                    data = decompressor.decompress(chunk)
+                    chunk = b""
+                else:
+                    data = decompressor.decompress(chunk, max_length)
+                    # zlib hands back unread input; lzma buffers it internally
+                    chunk = getattr(decompressor, "unconsumed_tail", b"")
+            except CODEC_ERRORS as e:
+                raise ValueError(f"Corrupt compressed log: {e}") from e
+            total += len(data)
+            if max_bytes is not None and total > max_bytes:
+                raise UploadTooLargeError(
+                    f"Decompressed log exceeds the limit of {max_bytes} bytes."
+                )
+            if data:
+                yield data
+            if decompressor.eof:
+                chunk = decompressor.unused_data + chunk
+            elif not chunk and (max_length is None or len(data) < max_length):
+                break
+    if not decompressor.eof:
+        raise ValueError("Compressed log is truncated.")
+
+
+def decompress_chunks(
+    chunks: Iterable[bytes], log_name: str, max_bytes: Optional[int] = None
+) -> Iterator[bytes]:
+    """Decompress a streamed log according to its file name extension.
+
+    :param Iterable[bytes] chunks: Raw bytes of the log file in stream order.
+    :param str log_name: File name of the log, used to pick the codec.
+    :param Optional[int] max_bytes: Maximum decompressed size, or None for no limit.
+    :returns: An iterator over the decompressed bytes; plain logs are passed through.
+    :rtype: Iterator[bytes]
+    :raises ImportError: If the log is zstd-compressed and zstandard is not installed.
+    """
+    if log_name.endswith(".gz"):
+        # Like gzip.open, ignore NUL padding after a member
+        return _iter_decompressed(
+            chunks,
+            lambda: zlib.decompressobj(wbits=16 + zlib.MAX_WBITS),
+            max_bytes,
+            padding=b"\x00",
+        )
+    if log_name.endswith(".xz"):
+        return _iter_decompressed(chunks, lzma.LZMADecompressor, max_bytes)
+    if log_name.endswith(".zst"):
+        _require_zstandard()
+        return _iter_decompressed(
+            _split_chunks(chunks, ZSTD_INPUT_STEP),
+            lambda: zstandard.ZstdDecompressor().decompressobj(),
+            max_bytes,
+            max_length=None,
+        )
+    return iter(chunks)
+
+
+def process_log_file(log_file: str, csv_file: str) -> None:
+    """Process a log file to extract SESSION_INFO_NTF and JSON data into a CSV file.
+
+    :param str log_file: Path to the input log file, optionally compressed.
+    :param str csv_file: Path to the output CSV file.
+    :returns: None
+    :rtype: None
+    """
+    with open_log_file(log_file) as f:
+        entries: List[Dict] = list(iter_log_entries(f))
 
     if entries:
         all_keys = sorted(set().union(*entries))
@@ -105,6 +268,280 @@ def process_log_file(log_file: str, csv_file: str) -> None:
                 writer.writerow(entry)
 
 
+def iter_stream_chunks(
+    stream: IO[bytes], chunk_size: int = 64 * 1024, max_bytes: Optional[int] = None
+) -> Iterator[bytes]:
+    """Read a binary stream in chunks, enforcing an optional size limit.
+
+    The next chunk is only read once the consumer asks for it, so a slow consumer
+    throttles the reader instead of data piling up in memory.
+
+    :param IO[bytes] stream: Binary stream to read from.
+    :param int chunk_size: Maximum number of bytes per chunk.
+    :param Optional[int] max_bytes: Maximum total number of bytes, or None for no limit.
+    :returns: An iterator over the chunks read.
+    :rtype: Iterator[bytes]
+    :raises UploadTooLargeError: If more than max_bytes bytes are read.
+    """
+    received = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        received += len(chunk)
+        if max_bytes is not None and received > max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds the limit of {max_bytes} bytes.")
+        yield chunk
+
+
+def iter_text_lines(
+    chunks: Iterable[bytes],
+    encoding: str = "utf-8",
+    max_line_length: int = 1024 * 1024,
+) -> Iterator[str]:
+    """Decode byte chunks incrementally and split them into lines.
+
+    :param Iterable[bytes] chunks: Byte chunks in stream order.
+    :param str encoding: Text encoding of the stream.
+    :param int max_line_length: Maximum number of characters in a single line.
+    :returns: An iterator over the decoded lines, without line terminators.
+    :rtype: Iterator[str]
+    :raises ValueError: If a line is longer than max_line_length.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        if len(pending) > max_line_length or any(
+            len(line) > max_line_length for line in lines
+        ):
+            raise ValueError(f"Line exceeds the limit of {max_line_length} characters.")
+        yield from lines
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _quote_identifier(name: str) -> str:
+    """Quote a table or column name for use in an SQLite statement."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _coerce_value(value: Any) -> Any:
+    """Convert a parsed log value to the type pandas would infer when reading the CSV."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if value == "":
+        return None
+    if isinstance(value, (dict, list)):
+        return str(value)
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _insert_entries(
+    conn: sqlite3.Connection, table_name: str, columns: List[str], entries: List[Dict]
+) -> int:
+    """Insert a batch of entries, creating the table or adding columns as needed.
+
+    :param sqlite3.Connection conn: SQLite database connection object.
+    :param str table_name: Name of the destination table.
+    :param List[str] columns: Columns of the table so far; extended in place.
+    :param List[Dict] entries: Entries to insert.
+    :returns: Number of rows inserted.
+    :rtype: int
+    """
+    if not entries:
+        return 0
+    table = _quote_identifier(table_name)
+    new_columns = sorted(set().union(*entries) - set(columns))
+    if not columns:
+        column_defs = ", ".join(_quote_identifier(c) for c in new_columns)
+        conn.execute(f"CREATE TABLE {table} ({column_defs})")
+    else:
+        for column in new_columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {_quote_identifier(column)}")
+    columns.extend(new_columns)
+
+    placeholders = ", ".join("?" for _ in columns)
+    column_names = ", ".join(_quote_identifier(c) for c in columns)
+    conn.executemany(
+        f"INSERT INTO {table} ({column_names}) VALUES ({placeholders})",
+        ([_coerce_value(entry.get(c)) for c in columns] for entry in entries),
+    )
+    return len(entries)
+
+
+def _iter_batches(entries: Iterable[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    """Group entries into lists of at most batch_size entries."""
+    entries = iter(entries)
+    while True:
+        batch = list(itertools.islice(entries, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _write_table_csv(
+    conn: sqlite3.Connection,
+    table_name: str,
+    columns: List[str],
+    csvfile: IO[str],
+    batch_size: int = 1000,
+) -> None:
+    """Write an SQLite table to a CSV file, paging through it with a cursor.
+
+    :param sqlite3.Connection conn: SQLite database connection object.
+    :param str table_name: Name of the table to export.
+    :param List[str] columns: Columns to export, in output order.
+    :param IO[str] csvfile: Open text file to write to.
+    :param int batch_size: Number of rows fetched at a time.
+    :returns: None
+    :rtype: None
+    """
+    column_names = ", ".join(_quote_identifier(c) for c in columns)
+    cursor = conn.execute(
+        f"SELECT {column_names} FROM {_quote_identifier(table_name)}"
+    )
+    writer = csv.writer(csvfile)
+    writer.writerow(columns)
+    while rows := cursor.fetchmany(batch_size):
+        writer.writerows(rows)
+
+
+def load_log_stream(
+    lines: Iterable[str],
+    table_name: str,
+    conn: sqlite3.Connection,
+    csv_file: Optional[str] = None,
+    batch_size: int = 1000,
+) -> int:
+    """Parse log lines and insert the entries into an SQLite table as they are parsed.
+
+    Entries are written to a staging table, committing after every batch so that other
+    writers are never locked out for the length of the stream. Once the stream ends the
+    staging table is renamed over the destination in one short transaction, so a failed,
+    aborted or empty stream leaves the previous table and CSV file untouched. Each batch
+    is also written to the optional CSV file as it is inserted, in the same layout as
+    process_log_file. If new columns appear after the first batch, the CSV file is
+    rewritten from the table once the stream ends. D_cm is renamed to distance[cm] in the
+    table as in create_table_from_csv.
+
+    :param Iterable[str] lines: Lines of a log file.
+    :param str table_name: Name of the destination table.
+    :param sqlite3.Connection conn: SQLite database connection object.
+    :param Optional[str] csv_file: Path of the CSV file to write, or None to skip it.
+    :param int batch_size: Number of entries inserted per statement batch.
+    :returns: Number of rows inserted.
+    :rtype: int
+    :raises sqlite3.OperationalError: If the database stays locked by another writer.
+    """
+    table = _quote_identifier(table_name)
+    staging_name = f"_staging_{table_name}_{uuid.uuid4().hex}"
+    staging = _quote_identifier(staging_name)
+    columns: List[str] = []
+    row_count = 0
+    csv_part = csv_file + ".part" if csv_file is not None else None
+    csvfile = open(csv_part, "w", newline="") if csv_part is not None else None
+    writer: Optional[csv.DictWriter] = None
+    rewrite_csv = False
+    swapped = False
+
+    try:
+        for batch in _iter_batches(iter_log_entries(lines), batch_size):
+            row_count += _insert_entries(conn, staging_name, columns, batch)
+            conn.commit()
+            if csvfile is None or rewrite_csv:
+                continue
+            if writer is None:
+                writer = csv.DictWriter(csvfile, fieldnames=sorted(columns))
+                writer.writeheader()
+            if len(columns) > len(writer.fieldnames):
+                rewrite_csv = True
+            else:
+                writer.writerows(batch)
+        if not row_count:
+            # Like process_log_file, a log without entries leaves existing output alone
+            return 0
+
+        if csvfile is not None:
+            if rewrite_csv:
+                csvfile.seek(0)
+                csvfile.truncate()
+                _write_table_csv(conn, staging_name, sorted(columns), csvfile)
+            csvfile.close()
+        if "D_cm" in columns and "distance[cm]" not in columns:
+            conn.execute(
+                f'ALTER TABLE {staging} RENAME COLUMN "D_cm" TO "distance[cm]"'
+            )
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute(f"ALTER TABLE {staging} RENAME TO {table}")
+        conn.commit()
+        swapped = True
+        if csv_part is not None:
+            os.replace(csv_part, csv_file)
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        # columns is only filled in once the staging table has been created
+        if columns and not swapped:
+            try:
+                conn.execute(f"DROP TABLE IF EXISTS {staging}")
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Could not drop staging table {staging_name}: {e}")
+        if csvfile is not None:
+            csvfile.close()
+        if csv_part is not None and os.path.exists(csv_part):
+            os.remove(csv_part)
+    return row_count
+
+
+def ingest_log_stream(
+    chunks: Iterable[bytes],
+    log_name: str,
+    output_dir: str = "./output",
+    db_file: str = "./logs_data.db",
+    max_decompressed_bytes: Optional[int] = None,
+) -> int:
+    """Parse a log file delivered as byte chunks straight into the CSV output and database.
+
+    Compressed logs (.log.gz, .log.xz, .log.zst) are decompressed as they stream in.
+    Nothing is committed if the log is corrupt, truncated or over the size limit.
+
+    :param Iterable[bytes] chunks: Raw bytes of the log file in stream order.
+    :param str log_name: File name of the log, used to name the CSV file and table.
+    :param str output_dir: Directory where the output CSV file will be saved.
+    :param str db_file: Path to the SQLite database file.
+    :param Optional[int] max_decompressed_bytes: Maximum decompressed size of a compressed
+        log, or None for no limit.
+    :returns: Number of entries loaded.
+    :rtype: int
+    :raises ImportError: If the log is zstd-compressed and zstandard is not installed.
+    :raises UploadTooLargeError: If the decompressed log exceeds max_decompressed_bytes.
+    :raises ValueError: If the compressed log is corrupt or truncated.
+    """
+    lines = iter_text_lines(
+        decompress_chunks(chunks, log_name, max_decompressed_bytes)
+    )
+    os.makedirs(output_dir, exist_ok=True)
+    table_name = strip_log_suffix(log_name) or os.path.splitext(log_name)[0]
+    csv_path = os.path.join(output_dir, table_name + ".csv")
+
+    conn = sqlite3.connect(db_file)
+    try:
+        return load_log_stream(lines, table_name, conn, csv_path)
+    finally:
+        conn.close()
+
+
 def create_table_from_csv(csv_file: str, conn: sqlite3.Connection) -> None:
     """Create a table and insert data from a CSV file into an SQLite database.
 
@@ -143,6 +580,9 @@ def run_log_processing(
 ) -> bool:
     """Run the entire log processing pipeline.
 
+    Compressed logs (.log.gz, .log.xz, .log.zst) are read through streaming decompression.
+    .log.zst files are skipped with a warning if zstandard is not installed.
+
     :param str log_dir: Directory containing log files.
     :param str output_dir: Directory where output CSV files will be saved.
     :param str db_file: Path to the SQLite database file.
@@ -152,10 +592,13 @@ def run_log_processing(
     os.makedirs(output_dir, exist_ok=True)
 
     for log_file in os.listdir(log_dir):
-        if log_file.endswith(".log"):
+        base_name = strip_log_suffix(log_file)
+        if base_name is not None:
+            if log_file.endswith(".zst") and zstandard is None:
+                print(f"Skipping {log_file}: zstandard is not installed.")
+                continue
             log_path = os.path.join(log_dir, log_file)
-            csv_file_name = os.path.splitext(log_file)[0] + ".csv"
-            csv_path = os.path.join(output_dir, csv_file_name)
+            csv_path = os.path.join(output_dir, base_name + ".csv")
             process_log_file(log_path, csv_path)
 
     process_csv_files(output_dir, db_file)
@@ -6,9 +6,10 @@ import numpy as np
 import pandas as pd
 
 matplotlib.use("Agg")
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import matplotlib.pyplot as plt
+from error_sketch import DecimatedSeries, ErrorSketch
 from tabulate import tabulate
 
 
@@ -23,9 +24,16 @@ class Orchestrator:
         distance_column (str): Name of the column representing distances.
         status_column (str): Name of the column representing statuses.
         dataframes (Dict[Tuple[int, int], List[pd.DataFrame]]): Loaded dataframes grouped by (distance, angle).
+        file_paths (Dict[Tuple[int, int], List[str]]): In sketch mode, CSV paths grouped by (distance, angle)
+            instead of loaded dataframes.
+        sketch_mode (bool): Summarise errors with bounded-memory ErrorSketch objects instead of lists.
         results (Dict[Tuple[int, int], Tuple[List[Dict[str, float]], plt.Figure, List[List[float]]]]):
             Results containing metrics, plots, and errors for each (distance, angle).
+            In sketch mode the errors are a list of ErrorSketch objects.
         point_list (List[Tuple[int, int, int]]): List of (point_id, distance, angle) for processed points.
+        board_types (List[str]): Board types encountered while loading files, in load order.
+        metrics_cube (Optional[pd.DataFrame]): Additive error statistics indexed by
+            (board_type, status, distance, angle), filled by run_batch_analysis.
     """
 
     FILE_INDEX_TO_DEGREE = {
@@ -39,12 +47,35 @@ class Orchestrator:
         8: "315°",
     }
 
+    # Handles "Big", "Small" or "BigSmall" boards and an optional file index
+    FILE_PATTERN = r"Putty_(Big|Small|BigSmall)_(\d+)cm_initf_115200_(\d+)_degree(?:_(\d+))?\.csv"
+
+    CUBE_KEYS = ["board_type", "status", "distance", "angle"]
+    # How each cube column combines across rows and partial cubes
+    CUBE_AGGREGATIONS = {
+        "count": "sum",
+        "sum_error": "sum",
+        "sum_abs_error": "sum",
+        "sum_sq_error": "sum",
+        "max_abs_error": "max",
+        "sum_ape": "sum",
+        "n_ape": "sum",
+    }
+
+    # Sketch mode: rows read per block and points kept per line plot
+    SKETCH_BLOCK_SIZE = 65536
+    MAX_PLOT_POINTS = 2000
+
+    # Equivalent column names used by the different board firmwares
+    COLUMN_ALIASES = [{"distance[cm]", "D_cm"}, {"status", "Status"}]
+
     def __init__(
         self,
         directory: str,
         specific_value: str,
         distance_column: str,
         status_column: str,
+        sketch_mode: bool = False,
     ) -> None:
         """
         Initialize the Orchestrator class with configuration parameters.
@@ -53,35 +84,39 @@ class Orchestrator:
         :param specific_value: The specific value to filter measurements.
         :param distance_column: Name of the column representing distances.
         :param status_column: Name of the column representing statuses.
+        :param sketch_mode: Keep bounded-memory error sketches instead of full error lists.
         """
         self.directory: str = os.path.abspath(directory)
         self.specific_value: str = specific_value
         self.distance_column: str = distance_column
         self.status_column: str = status_column
+        self.sketch_mode: bool = sketch_mode
         self.dataframes: Dict[Tuple[int, int], List[pd.DataFrame]] = {}
+        self.file_paths: Dict[Tuple[int, int], List[str]] = {}
         self.results: Dict[
             Tuple[int, int],
             Tuple[List[Dict[str, float]], plt.Figure, List[List[float]]],
         ] = {}
         self.point_list: List[Tuple[int, int, int]] = []
         self.board_type: Optional[str] = None  # "Big" or "Small"
+        self.board_types: List[str] = []
+        self.metrics_cube: Optional[pd.DataFrame] = None
 
     def load_csv_files(self) -> None:
         """
         Load CSV files from the directory and group them by (distance, angle).
 
+        In sketch mode only the file paths are recorded; the files are streamed later.
+
         :raises FileNotFoundError: If the specified directory does not exist.
         """
         current_dir = os.getcwd()
         try:
             os.chdir(self.directory)
             print("Loading CSV files...")
-            # Updated pattern to handle "Big", "Small", or "BigSmall" boards and optional index
-            pattern = r"Putty_(Big|Small|BigSmall)_(\d+)cm_initf_115200_(\d+)_degree(?:_(\d+))?\.csv"
-
             for file in os.listdir(self.directory):
                 if file.endswith(".csv"):
-                    match = re.match(pattern, file)
+                    match = re.match(self.FILE_PATTERN, file)
                     if match:
                         board_type, dist_str, angle_str, file_index_str = match.groups()
                         distance = int(dist_str)
@@ -90,14 +125,21 @@ class Orchestrator:
                         # Store the board_type if not already stored
                         if self.board_type is None:
                             self.board_type = board_type
+                        if board_type not in self.board_types:
+                            self.board_types.append(board_type)
 
-                        df = pd.read_csv(os.path.join(self.directory, file))
+                        path = os.path.join(self.directory, file)
+                        if self.sketch_mode:
+                            self.file_paths.setdefault((distance, angle), []).append(path)
+                            print(f"Found {file} for group ({distance}, {angle})")
+                            continue
+
+                        df = pd.read_csv(path)
                         self.dataframes.setdefault((distance, angle), []).append(df)
                         print(f"Loaded {file} into dataframes[({distance}, {angle})]")
 
-            print(
-                f"Total number of (distance, angle) groups loaded: {len(self.dataframes)}"
-            )
+            groups = self.file_paths if self.sketch_mode else self.dataframes
+            print(f"Total number of (distance, angle) groups loaded: {len(groups)}")
         finally:
             os.chdir(current_dir)
 
@@ -132,6 +174,13 @@ class Orchestrator:
         :param title_suffix: Suffix for the plot title.
         :returns: A tuple containing a list of metrics, a plot figure, and errors.
         """
+        if self.sketch_mode:
+            return self.analyze_measurements_sketched(
+                [[np.asarray(m, dtype=float)] for m in measurements_list],
+                target_value,
+                title_suffix,
+            )
+
         metrics_list = []
         errors_list = []
         for measurements in measurements_list:
@@ -160,6 +209,58 @@ class Orchestrator:
         )
         return metrics_list, fig, errors_list
 
+    def iter_measurement_blocks(self, path: str) -> Iterator[np.ndarray]:
+        """
+        Read the measurements matching the specific value from a CSV file in blocks.
+
+        Only the distance and status columns are read, SKETCH_BLOCK_SIZE rows at a time.
+
+        :param path: Path to the CSV file.
+        :returns: An iterator over arrays of filtered measurements.
+        """
+        for chunk in pd.read_csv(
+            path,
+            usecols=[self.distance_column, self.status_column],
+            chunksize=self.SKETCH_BLOCK_SIZE,
+        ):
+            status = chunk[self.status_column].astype(str).str.lower()
+            yield chunk.loc[
+                status == self.specific_value.lower(), self.distance_column
+            ].to_numpy(dtype=float)
+
+    def analyze_measurements_sketched(
+        self,
+        measurement_blocks: List[Iterable[np.ndarray]],
+        target_value: int,
+        title_suffix: str = "",
+    ) -> Tuple[List[Dict[str, float]], plt.Figure, List[ErrorSketch]]:
+        """
+        Analyze measurements in a streaming pass, summarising errors with ErrorSketch objects.
+
+        Each file is consumed block by block, so memory per file is constant regardless of
+        the number of samples; see ErrorSketch for the accuracy of each metric.
+
+        :param measurement_blocks: For each file, an iterable of measurement arrays.
+        :param target_value: Target value for comparison.
+        :param title_suffix: Suffix for the plot title.
+        :returns: A tuple containing a list of metrics, a plot figure, and error sketches.
+        """
+        metrics_list = []
+        sketches = []
+        samples = []
+        for blocks in measurement_blocks:
+            sketch = ErrorSketch()
+            sample = DecimatedSeries(self.MAX_PLOT_POINTS)
+            for block in blocks:
+                sketch.update(block - target_value)
+                sample.update(block)
+            metrics_list.append(sketch.metrics(target_value))
+            sketches.append(sketch)
+            samples.append(sample.values)
+
+        fig = self.visualize_results(samples, sketches, target_value, title_suffix)
+        return metrics_list, fig, sketches
+
     def visualize_results(
         self,
         measurements_list: List[List[float]],
@@ -170,12 +271,19 @@ class Orchestrator:
         """
         Generate visualizations for measurements and errors.
 
-        :param measurements_list: List of measurements for each file.
-        :param errors_list: List of errors for each file.
+        :param measurements_list: List of measurements for each file; a thinned sample in sketch mode.
+        :param errors_list: List of errors for each file, or of ErrorSketch objects in sketch mode.
         :param target_value: Target value for comparison.
         :param title_suffix: Suffix for the plot title.
         :returns: A matplotlib Figure object containing the plots.
         """
+        sketches = errors_list if self.sketch_mode else None
+        if sketches is not None:
+            errors_list = [
+                (np.asarray(m, dtype=float) - target_value).tolist()
+                for m in measurements_list
+            ]
+
         colors = plt.cm.tab10.colors  # Use a colormap with 10 distinct colors
         num_files = len(measurements_list)
 
@@ -196,9 +304,23 @@ class Orchestrator:
         )
 
         ax1 = fig.add_subplot(2, 2, 1)
-        ax1.hist(
-            errors_list, bins=10, color=colors[:num_files], alpha=0.6, edgecolor="black"
-        )
+        if sketches is not None:
+            ax1.hist(
+                [s.histogram.centers() for s in sketches],
+                bins=10,
+                weights=[s.histogram.weights() for s in sketches],
+                color=colors[:num_files],
+                alpha=0.6,
+                edgecolor="black",
+            )
+        else:
+            ax1.hist(
+                errors_list,
+                bins=10,
+                color=colors[:num_files],
+                alpha=0.6,
+                edgecolor="black",
+            )
         ax1.set_title("Histogram of Errors")
         ax1.legend(title="Degrees", labels=degrees)
 
@@ -216,7 +338,16 @@ class Orchestrator:
         ax3.legend(title="Degrees")
 
         ax4 = fig.add_subplot(2, 2, 4)
-        bplot = ax4.boxplot(errors_list, vert=False, patch_artist=True, labels=degrees)
+        if sketches is not None:
+            bplot = ax4.bxp(
+                [s.boxplot_stats(d) for s, d in zip(sketches, degrees)],
+                vert=False,
+                patch_artist=True,
+            )
+        else:
+            bplot = ax4.boxplot(
+                errors_list, vert=False, patch_artist=True, labels=degrees
+            )
         for i, box in enumerate(bplot["boxes"]):
             box.set_facecolor(colors[i])
         ax4.set_title("Boxplot of Errors per Degree")
@@ -231,40 +362,259 @@ class Orchestrator:
         :param distance_targets: A dictionary mapping distances to their target values.
         """
         self.load_csv_files()
-        # Adjust the distance_targets based on board type
-        if self.board_type == "Big":
-            # For Big boards: 100, 150, 200
-            distance_targets = {100: 100, 150: 150, 200: 200}
-        elif self.board_type == "Small":
-            # For Small boards: 100, 200, 300
-            distance_targets = {100: 100, 200: 200, 300: 300}
+        distance_targets = self.targets_for_board(self.board_type, distance_targets)
 
-        all_pairs = sorted(self.dataframes.keys(), key=lambda x: (x[0], x[1]))
+        groups = self.file_paths if self.sketch_mode else self.dataframes
+        all_pairs = sorted(groups.keys(), key=lambda x: (x[0], x[1]))
         point_id = 1
         for distance, angle in all_pairs:
             # Default to 100 if no target provided
             target_value = distance_targets.get(distance, 100)
-            measurements_list = self.concatenate_values(distance, angle)
-            if any(len(m) > 0 for m in measurements_list):
-                suffix = f"{distance}cm_{angle}degree"
+            suffix = f"{distance}cm_{angle}degree"
+            if self.sketch_mode:
+                # Files are streamed straight into the sketches, never loaded whole
+                measurement_blocks = [
+                    self.iter_measurement_blocks(path)
+                    for path in self.file_paths[(distance, angle)]
+                ]
+                metrics_list, fig, errors_list = self.analyze_measurements_sketched(
+                    measurement_blocks, target_value, suffix
+                )
+                if not any(sketch.count > 0 for sketch in errors_list):
+                    plt.close(fig)
+                    continue
+            else:
+                measurements_list = self.concatenate_values(distance, angle)
+                if not any(len(m) > 0 for m in measurements_list):
+                    continue
                 metrics_list, fig, errors_list = self.analyze_measurements(
                     measurements_list, target_value, suffix
                 )
-                self.results[(distance, angle)] = (metrics_list, fig, errors_list)
-                self.point_list.append((point_id, distance, angle))
-                point_id += 1
+            self.results[(distance, angle)] = (metrics_list, fig, errors_list)
+            self.point_list.append((point_id, distance, angle))
+            point_id += 1
+
+    @staticmethod
+    def targets_for_board(
+        board_type: Optional[str], distance_targets: Dict[int, int]
+    ) -> Dict[int, int]:
+        """
+        Return the distance targets that apply to a given board type.
+
+        :param board_type: Board type ("Big", "Small" or "BigSmall").
+        :param distance_targets: Default mapping of distances to target values.
+        :returns: The mapping of distances to target values for this board type.
+        """
+        if board_type == "Big":
+            # For Big boards: 100, 150, 200
+            return {100: 100, 150: 150, 200: 200}
+        if board_type == "Small":
+            # For Small boards: 100, 200, 300
+            return {100: 100, 200: 200, 300: 300}
+        return distance_targets
+
+    def _column_names(self, column: str) -> set:
+        """
+        Return the configured column name together with its known aliases.
+
+        :param column: Column name given in the configuration.
+        :returns: A set of accepted column names.
+        """
+        for aliases in self.COLUMN_ALIASES:
+            if column in aliases:
+                return set(aliases)
+        return {column}
+
+    def iter_measurement_frames(self) -> Iterator[pd.DataFrame]:
+        """
+        Read the matching CSV files one at a time as long-format DataFrames.
+
+        Only the distance and status columns are read, accepting the aliases in
+        COLUMN_ALIASES so that Big and Small board files can be mixed. Files lacking
+        either column are skipped.
+
+        :returns: An iterator over DataFrames with board_type, status, distance, angle and value columns.
+        :raises FileNotFoundError: If the specified directory does not exist.
+        """
+        print("Loading CSV files for batch analysis...")
+        distance_names = self._column_names(self.distance_column)
+        status_names = self._column_names(self.status_column)
+        wanted = distance_names | status_names
+        for file in sorted(os.listdir(self.directory)):
+            match = re.fullmatch(self.FILE_PATTERN, file)
+            if not match:
+                continue
+            board_type, dist_str, angle_str, _ = match.groups()
+            df = pd.read_csv(
+                os.path.join(self.directory, file), usecols=lambda c: c in wanted
+            )
+            distance_col = next((c for c in df.columns if c in distance_names), None)
+            status_col = next((c for c in df.columns if c in status_names), None)
+            if distance_col is None or status_col is None:
+                print(f"Skipping {file}: missing distance or status column")
+                continue
+
+            if board_type not in self.board_types:
+                self.board_types.append(board_type)
+            yield pd.DataFrame(
+                {
+                    "board_type": board_type,
+                    "status": df[status_col].astype(str).str.upper(),
+                    "distance": int(dist_str),
+                    "angle": int(angle_str),
+                    "value": pd.to_numeric(df[distance_col], errors="coerce"),
+                }
+            )
+
+    def _partial_cube(
+        self, frame: pd.DataFrame, distance_targets: Dict[int, int]
+    ) -> pd.DataFrame:
+        """
+        Aggregate the error sums of one file's measurements per cube cell.
+
+        :param frame: Measurements as returned by iter_measurement_frames.
+        :param distance_targets: A dictionary mapping distances to their target values.
+        :returns: A partial metrics cube indexed by CUBE_KEYS.
+        """
+        frame = frame.dropna(subset=["value"])
+        target = pd.Series(100.0, index=frame.index)
+        for board_type in frame["board_type"].unique():
+            board_targets = self.targets_for_board(board_type, distance_targets)
+            mask = frame["board_type"] == board_type
+            # Default to 100 if no target provided
+            target[mask] = frame.loc[mask, "distance"].map(board_targets).fillna(100)
+
+        error = frame["value"] - target
+        abs_error = error.abs()
+        stats = pd.DataFrame(
+            {
+                "count": 1,
+                "sum_error": error,
+                "sum_abs_error": abs_error,
+                "sum_sq_error": error**2,
+                "max_abs_error": abs_error,
+                "sum_ape": (abs_error / target * 100).where(target != 0),
+            }
+        )
+        stats["n_ape"] = stats["sum_ape"].notna().astype(int)
+        grouped = stats.groupby([frame[key] for key in self.CUBE_KEYS])
+        return grouped.agg(self.CUBE_AGGREGATIONS)
+
+    def run_batch_analysis(self, distance_targets: Dict[int, int]) -> pd.DataFrame:
+        """
+        Compute error statistics for every (board_type, status, distance, angle) combination in one scan.
+
+        Each file is reduced to a partial cube as it is read, so only one file is held in
+        memory at a time. The cube stores additive sums rather than final metrics so that
+        any slice of it can be rolled up by slice_metrics without rereading the data.
+
+        :param distance_targets: A dictionary mapping distances to their target values.
+        :returns: The metrics cube, also stored in self.metrics_cube.
+        :raises FileNotFoundError: If the specified directory does not exist.
+        """
+        partials = [
+            self._partial_cube(frame, distance_targets)
+            for frame in self.iter_measurement_frames()
+        ]
+        if partials:
+            cube = (
+                pd.concat(partials)
+                .groupby(level=self.CUBE_KEYS, sort=True)
+                .agg(self.CUBE_AGGREGATIONS)
+            )
+        else:
+            cube = pd.DataFrame(
+                columns=list(self.CUBE_AGGREGATIONS),
+                index=pd.MultiIndex.from_tuples([], names=self.CUBE_KEYS),
+            )
+        self.metrics_cube = cube
+        print(f"Total number of batch cells computed: {len(self.metrics_cube)}")
+        return self.metrics_cube
+
+    def slice_metrics(
+        self,
+        board_type: Optional[str] = None,
+        status: Optional[str] = None,
+        distance: Optional[int] = None,
+        angle: Optional[int] = None,
+    ) -> Dict[str, float]:
+        """
+        Roll up the metrics cube for a slice. Criteria left as None match every value.
+
+        :param board_type: Board type to select.
+        :param status: Status value to select (case-insensitive).
+        :param distance: Distance to select.
+        :param angle: Angle to select.
+        :returns: Error metrics for all measurements in the slice.
+        :raises ValueError: If batch analysis has not been run or the slice is empty.
+        """
+        if self.metrics_cube is None:
+            raise ValueError("Batch analysis has not been run.")
+
+        cells = self.metrics_cube.reset_index()
+        criteria = {
+            "board_type": board_type,
+            "status": status.upper() if status is not None else None,
+            "distance": distance,
+            "angle": angle,
+        }
+        for key, value in criteria.items():
+            if value is not None:
+                cells = cells[cells[key] == value]
+        if cells.empty:
+            raise ValueError(f"No measurements match slice {criteria}.")
+
+        totals = cells.sum(numeric_only=True)
+        n = totals["count"]
+        mean_error = totals["sum_error"] / n
+        mse = totals["sum_sq_error"] / n
+        return {
+            "MAE": totals["sum_abs_error"] / n,
+            "MSE": mse,
+            "RMSE": np.sqrt(mse),
+            "MAPE": totals["sum_ape"] / totals["n_ape"] if totals["n_ape"] > 0 else None,
+            "Max Error": cells["max_abs_error"].max(),
+            "Std Error": np.sqrt(max(mse - mean_error**2, 0.0)),
+            "Samples": int(n),
+        }
+
+    def compare_slices(
+        self, slice1: Dict[str, object], slice2: Dict[str, object]
+    ) -> str:
+        """
+        Compare the metrics of two slices of the metrics cube.
+
+        :param slice1: Criteria for the first slice, as accepted by slice_metrics.
+        :param slice2: Criteria for the second slice, as accepted by slice_metrics.
+        :returns: A formatted string containing the comparison table.
+        """
+
+        def label(criteria: Dict[str, object]) -> str:
+            parts = [f"{k}={v}" for k, v in criteria.items() if v is not None]
+            return ", ".join(parts) or "all"
+
+        return self.compare_metrics(
+            self.slice_metrics(**slice1),
+            self.slice_metrics(**slice2),
+            labels=(label(slice1), label(slice2)),
+        )
 
     @staticmethod
-    def compare_metrics(metrics1: Dict[str, float], metrics2: Dict[str, float]) -> str:
+    def compare_metrics(
+        metrics1: Dict[str, float],
+        metrics2: Dict[str, float],
+        labels: Tuple[str, str] = ("SET1", "SET2"),
+    ) -> str:
         """
         Compare two sets of metrics and return a formatted table.
 
         :param metrics1: First set of metrics.
         :param metrics2: Second set of metrics.
+        :param labels: Column headers for the two sets.
         :returns: A formatted string containing the comparison table.
         """
         combined = []
         for key in set(metrics1.keys()).union(metrics2.keys()):
             row = [key, metrics1.get(key, "None"), metrics2.get(key, "None")]
             combined.append(row)
-        return tabulate(combined, headers=["Metrics", "SET1", "SET2"], tablefmt="grid")
+        return tabulate(combined, headers=["Metrics", *labels], tablefmt="grid")